@@ -0,0 +1,51 @@
+"""
+Login and add-product throughput.
+
+Measures api_login_user (single joined lookup), api_add_product (seller approval
+check served from the TTL cache) and get_seller_status with a warm and a cold
+cache, against a temporary database.
+
+Run from the project root:  python benchmarks/bench_auth.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_operations
+import system_logic
+
+def rate(label, iterations, fn):
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    print(f"{label:>28}: {iterations / (time.perf_counter() - started):>10.0f} /s")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        db_operations.initialize_db()
+
+        rate("login (seller)", iterations, lambda i: system_logic.api_login_user("seller@approved.com", "passw123"))
+        rate("login (buyer)", iterations, lambda i: system_logic.api_login_user("buyer@example.com", "passw123"))
+
+        system_logic.api_login_user("seller@approved.com", "passw123")
+        rate("add product", iterations,
+             lambda i: system_logic.api_add_product(f"bench-{i}", "", 1.0, 1, "png", 1))
+
+        rate("seller status (cached)", iterations, lambda i: db_operations.get_seller_status("S999"))
+        def uncached(i):
+            db_operations.invalidate_seller_status("S999")
+            db_operations.get_seller_status("S999")
+        rate("seller status (uncached)", iterations, uncached)
+
+        system_logic.api_logout_user()
+        db_operations.close_db_connections()
+        os.chdir(os.path.dirname(workdir))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Read throughput of the read-only connection pool across 1 to 16 threads.
+
+Each thread runs get_product_details + search_products in a loop against a
+temporary database. A final run repeats the single-thread load while another
+thread keeps writing, showing that WAL readers are not blocked by the writer.
+
+Run from the project root:  python benchmarks/bench_read_scaling.py [products] [reads_per_thread]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_operations
+
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+
+def seed(products):
+    conn = db_operations.get_db_connection()
+    conn.executemany("INSERT INTO products (name, price, stock, seller_id) VALUES (?, ?, ?, ?)",
+                     ((f"bench-{i}", 1.5, i + 1, "S999") for i in range(products)))
+    conn.commit()
+    conn.close()
+
+def read_loop(products, reads):
+    for i in range(reads):
+        db_operations.get_product_details(i % products + 1)
+        db_operations.search_products("bench-12")
+
+def measure(threads, products, reads):
+    """Returns reads per second for the given number of reader threads."""
+    workers = [threading.Thread(target=read_loop, args=(products, reads)) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * reads * 2 / (time.perf_counter() - started)
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    reads = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        db_operations.READ_POOL_SIZE = max(THREAD_COUNTS)
+        db_operations.initialize_db()
+        seed(products)
+
+        print(f"CPUs: {os.cpu_count()}  products: {products}  reads/thread: {reads * 2}")
+        for threads in THREAD_COUNTS:
+            print(f"{threads:>2} threads: {measure(threads, products, reads):>9.0f} reads/s")
+
+        stop = threading.Event()
+        def write_loop():
+            while not stop.is_set():
+                db_operations.update_product_stock(1, 1)
+        writer = threading.Thread(target=write_loop)
+        writer.start()
+        try:
+            print(f" 1 thread + writer: {measure(1, products, reads):>9.0f} reads/s")
+        finally:
+            stop.set()
+            writer.join()
+
+        db_operations.close_db_connections()
+        os.chdir(os.path.dirname(workdir))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Write throughput against shard count.
+
+For each shard count, N processes (one seller each) insert products into a fresh
+temporary database. Shard count 0 is the unsharded single-file layout.
+
+Run from the project root:  python benchmarks/bench_shard_writes.py [processes] [inserts_per_process]
+"""
+import os
+import sys
+import tempfile
+import time
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_operations
+
+SHARD_COUNTS = [0, 1, 2, 4, 8]
+
+def configure(shard_count):
+    """Pool initializer: applies the shard count in every worker."""
+    db_operations.SHARD_COUNT = shard_count
+
+def insert_loop(args):
+    seller_id, inserts = args
+    for i in range(inserts):
+        db_operations.insert_product(seller_id, f"bench-{i}", "", 1.0, 1, "png")
+
+def measure(shard_count, processes, inserts):
+    """Returns inserts per second with the given shard count."""
+    configure(shard_count)
+    db_operations.initialize_db()
+    expected = len(db_operations.get_all_products()) + processes * inserts
+
+    with mp.Pool(processes, initializer=configure, initargs=(shard_count,)) as pool:
+        started = time.perf_counter()
+        pool.map(insert_loop, [(f"S{p}", inserts) for p in range(processes)])
+        elapsed = time.perf_counter() - started
+
+    assert len(db_operations.get_all_products()) == expected, "inserts were lost"
+    db_operations.close_db_connections()
+    return processes * inserts / elapsed
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    inserts = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        print(f"CPUs: {os.cpu_count()}  processes: {processes}  inserts/process: {inserts}")
+        for shard_count in SHARD_COUNTS:
+            label = "unsharded" if shard_count == 0 else f"{shard_count} shards"
+            print(f"{label:>10}: {measure(shard_count, processes, inserts):>8.0f} inserts/s")
+        os.chdir(os.path.dirname(workdir))
+
+if __name__ == "__main__":
+    main()
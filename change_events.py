@@ -0,0 +1,60 @@
+import threading
+import traceback
+
+# --- Topics ---
+# Keys are the changed ids; a key of None means "anything in this topic may have changed".
+PRODUCTS = "products" # New products (product ids)
+STOCK = "stock" # Stock level changes (product ids)
+ORDERS = "orders" # New orders (order ids)
+SELLERS = "sellers" # Seller approval status changes (seller ids)
+
+_subscribers = {} # {topic: [callback(changed_keys)]}
+_pending = {} # {topic: set of changed keys}
+_lock = threading.Lock()
+
+def subscribe(topic, callback):
+    """Registers callback(changed_keys) for a topic. changed_keys is a set, or None for 'everything'."""
+    with _lock:
+        _subscribers.setdefault(topic, []).append(callback)
+
+def unsubscribe(topic, callback):
+    """Removes a callback registered with subscribe()."""
+    with _lock:
+        callbacks = _subscribers.get(topic, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+def publish(topic, key=None):
+    """
+    Queues a change event (safe from any thread). Events are delivered, coalesced,
+    by the next dispatch_pending() call. Nothing is queued when nobody listens.
+    """
+    with _lock:
+        if _subscribers.get(topic):
+            _pending.setdefault(topic, set()).add(key)
+
+def dispatch_pending():
+    """
+    Delivers all queued changes. Each callback runs at most once, with the keys
+    merged across every topic it subscribes to, so a burst of events costs one redraw.
+    Call it once per frame from the GUI thread. A failing callback is logged and
+    does not stop the others. Returns True if anything was delivered.
+    """
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        subscribers = {topic: list(callbacks) for topic, callbacks in _subscribers.items()}
+
+    merged = {} # {callback: set of keys}
+    for topic, keys in pending.items():
+        for callback in subscribers.get(topic, []):
+            merged.setdefault(callback, set()).update(keys)
+
+    for callback, keys in merged.items():
+        try:
+            callback(None if None in keys else keys)
+        except Exception as e:
+            name = getattr(callback, "__name__", repr(callback))
+            print(f"WARNING: Change event callback {name} failed: {e}")
+            traceback.print_exc()
+    return bool(pending)
@@ -1,25 +1,276 @@
 import sqlite3
 import os
+import heapq
+import queue
+import random
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import change_events
 
 DB_NAME = "ecommerce_test_db.sqlite"
 
-def get_db_connection():
+REPORT_FETCH_SIZE = 1000 # Rows pulled per fetchmany() call when streaming reports
+
+# --- Sharded Storage (optional) ---
+# With DB_SHARD_COUNT > 0, products and orders live in N shard files partitioned by
+# seller_id / buyer_id hash; users and sellers stay in the global DB_NAME file.
+# Shard row ids are strided so that id % SHARD_COUNT is the shard holding the row.
+SHARD_COUNT = int(os.getenv("DB_SHARD_COUNT", "0"))
+
+# --- Write Contention Settings ---
+# How long SQLite itself waits on a locked database before raising SQLITE_BUSY,
+# and how often a write transaction is retried (with jittered backoff) after that.
+BUSY_TIMEOUT_SECONDS = float(os.getenv("DB_BUSY_TIMEOUT_SECONDS", "5.0"))
+WRITE_RETRY_ATTEMPTS = int(os.getenv("DB_WRITE_RETRY_ATTEMPTS", "5"))
+WRITE_RETRY_BASE_DELAY = 0.05 # Seconds, doubled on every retry
+WRITE_RETRY_MAX_DELAY = 1.0
+
+# --- Read/Write Split ---
+# Per database file, reads borrow from a pool of read-only connections and writes
+# go through one serialized writer connection. With WAL, readers never block on the writer.
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+
+_read_pools = {} # {db_path: LifoQueue of idle read-only connections}
+_read_pool_created = {} # {db_path: connections opened so far}
+_writer_conns = {} # {db_path: writer connection}
+_writer_locks = {} # {db_path: RLock serializing that file's writes}
+_pool_lock = threading.Lock()
+_pool_pid = os.getpid() # Connections must not be shared with forked children
+_shard_executor = None
+_seen_data_versions = {} # {db_path: (writer connection, last PRAGMA data_version)}
+
+# --- Seller Status Cache ---
+# Approval status rarely changes, so lookups are cached for a short TTL.
+# update_seller_status() invalidates the entry; other processes see changes after the TTL.
+SELLER_STATUS_TTL_SECONDS = float(os.getenv("SELLER_STATUS_TTL_SECONDS", "30"))
+
+_seller_status_cache = {} # {seller_id: (expires_at, status row)}
+_seller_status_generations = {} # {seller_id: bumps}; key None counts invalidations of all sellers
+_seller_status_lock = threading.Lock()
+
+# Contention metrics, updated by run_write_transaction()
+DB_METRICS = {"transactions": 0, "retries": 0, "failures": 0, "lock_wait_seconds": 0.0, "retry_wait_seconds": 0.0}
+_metrics_lock = threading.Lock()
+
+def get_db_connection(db_path=None):
     """Returns a connection object for the SQLite database."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(db_path or DB_NAME, timeout=BUSY_TIMEOUT_SECONDS)
     conn.row_factory = sqlite3.Row # Allows accessing columns by column name
     return conn
 
-def initialize_db():
+def get_read_connection(db_path=None):
+    """Returns a read-only connection (mode=ro URI, query_only) to the database."""
+    from pathlib import Path # Deferred: only needed once per pooled connection
+    uri = Path(db_path or DB_NAME).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def _check_pool_owner():
+    """Drops inherited connections after a fork; they belong to the parent process."""
+    global _pool_pid, _shard_executor
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            _read_pools.clear()
+            _read_pool_created.clear()
+            _writer_conns.clear()
+            _writer_locks.clear()
+            _shard_executor = None
+            _pool_pid = os.getpid()
+
+def _writer_lock_for(db_path):
+    with _pool_lock:
+        return _writer_locks.setdefault(db_path, threading.RLock())
+
+@contextmanager
+def read_connection(db_path=None):
+    """Borrows a connection from the read-only pool for the duration of the block."""
+    db_path = db_path or DB_NAME
+    _check_pool_owner()
+    with _pool_lock:
+        pool = _read_pools.setdefault(db_path, queue.LifoQueue())
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            create = _read_pool_created.get(db_path, 0) < READ_POOL_SIZE
+            if create:
+                _read_pool_created[db_path] = _read_pool_created.get(db_path, 0) + 1
+        if create:
+            try:
+                conn = get_read_connection(db_path)
+            except Exception:
+                # Give the slot back, or failed opens would leave the pool with nothing to hand out
+                with _pool_lock:
+                    _read_pool_created[db_path] -= 1
+                raise
+        else:
+            try:
+                conn = pool.get(timeout=BUSY_TIMEOUT_SECONDS)
+            except queue.Empty:
+                raise sqlite3.OperationalError(
+                    f"No read connection to {db_path} became free within {BUSY_TIMEOUT_SECONDS}s") from None
+    try:
+        yield conn
+    finally:
+        pool.put(conn)
+
+def _get_writer_connection(db_path):
+    """Returns the single writer connection for a file (callers must hold its writer lock)."""
+    _check_pool_owner()
+    conn = _writer_conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.isolation_level = None # Transactions are managed by run_write_transaction()
+        _writer_conns[db_path] = conn
+    return conn
+
+def close_db_connections():
+    """Closes the pooled reader connections and the writer connections."""
+    _check_pool_owner()
+    with _pool_lock:
+        locks = list(_writer_locks.values())
+    for lock in locks:
+        lock.acquire()
+    try:
+        with _pool_lock:
+            for pool in _read_pools.values():
+                while True:
+                    try:
+                        pool.get_nowait().close()
+                    except queue.Empty:
+                        break
+            _read_pools.clear()
+            _read_pool_created.clear()
+            for conn in _writer_conns.values():
+                conn.close()
+            _writer_conns.clear()
+    finally:
+        for lock in locks:
+            lock.release()
+
+# =================================================================
+# SHARD ROUTING
+# =================================================================
+
+def shard_path(index):
+    """File name of a shard, e.g. ecommerce_test_db.shard0.sqlite."""
+    base, ext = os.path.splitext(DB_NAME)
+    return f"{base}.shard{index}{ext}"
+
+def shard_for_key(key):
+    """Shard index for a seller_id / buyer_id (crc32, stable across processes)."""
+    return zlib.crc32(str(key).encode("utf-8")) % SHARD_COUNT
+
+def catalog_db_paths():
+    """Every file holding products and orders: the shards, or just DB_NAME."""
+    if not SHARD_COUNT:
+        return [DB_NAME]
+    return [shard_path(i) for i in range(SHARD_COUNT)]
+
+def db_path_for_key(key):
+    """File holding the products of a seller / the orders of a buyer."""
+    return shard_path(shard_for_key(key)) if SHARD_COUNT else DB_NAME
+
+def db_path_for_id(row_id):
+    """File holding a product or order, derived from its strided id."""
+    return shard_path(int(row_id) % SHARD_COUNT) if SHARD_COUNT else DB_NAME
+
+def _new_id_sql(table, db_path):
     """
-    Initializes the database tables (users, sellers, products, orders) and 
-    seeds initial data if they don't exist.
+    SQL (and params) for the id of a new row. Unsharded ids are assigned by SQLite;
+    sharded ids continue the shard's stride. Must run inside the write transaction.
     """
-    if os.path.exists(DB_NAME):
-        os.remove(DB_NAME)
+    if not SHARD_COUNT:
+        return "NULL", ()
+    index = catalog_db_paths().index(db_path)
+    return f"(SELECT COALESCE(MAX(id), ?) + {SHARD_COUNT} FROM {table})", (index,)
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def fan_out(query_fn, db_paths=None):
+    """Runs query_fn(db_path) on every catalog file in parallel; returns the results in file order."""
+    global _shard_executor
+    db_paths = db_paths or catalog_db_paths()
+    if len(db_paths) == 1:
+        return [query_fn(db_paths[0])]
+    _check_pool_owner()
+    if _shard_executor is None:
+        from concurrent.futures import ThreadPoolExecutor # Deferred: only used in sharded mode
+        _shard_executor = ThreadPoolExecutor(max_workers=min(len(db_paths), 16), thread_name_prefix="shard")
+    return list(_shard_executor.map(query_fn, db_paths))
+
+def _record_metric(name, amount=1):
+    with _metrics_lock:
+        DB_METRICS[name] += amount
+
+def get_db_metrics():
+    """Returns a snapshot of the write contention metrics."""
+    with _metrics_lock:
+        return dict(DB_METRICS)
+
+def reset_db_metrics():
+    """Resets the write contention metrics to zero."""
+    with _metrics_lock:
+        for name in DB_METRICS:
+            DB_METRICS[name] = 0.0 if isinstance(DB_METRICS[name], float) else 0
+
+def _is_busy_error(error):
+    """True if the error is SQLITE_BUSY / 'database is locked'."""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def run_write_transaction(work, *args, db_path=None):
+    """
+    Runs work(cursor, *args) inside a BEGIN IMMEDIATE transaction on db_path (default
+    DB_NAME) and returns its result.
+    Writes from this process are serialized on the file's single writer connection; the
+    write lock is taken up front, so other processes queue on the busy timeout instead
+    of failing mid-transaction. If SQLite still reports busy, the whole transaction is
+    retried with jittered exponential backoff.
+    """
+    db_path = db_path or DB_NAME
+    attempt = 0
+    _check_pool_owner()
+    with _writer_lock_for(db_path):
+        while True:
+            conn = _get_writer_connection(db_path)
+            try:
+                started = time.perf_counter()
+                conn.execute("BEGIN IMMEDIATE")
+                _record_metric("lock_wait_seconds", time.perf_counter() - started)
+
+                result = work(conn.cursor(), *args)
+                conn.execute("COMMIT")
+                _record_metric("transactions")
+                return result
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                attempt += 1
+                if not _is_busy_error(e) or attempt > WRITE_RETRY_ATTEMPTS:
+                    _record_metric("failures")
+                    raise
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                _record_metric("failures")
+                raise
+
+            delay = min(WRITE_RETRY_BASE_DELAY * (2 ** (attempt - 1)), WRITE_RETRY_MAX_DELAY)
+            delay = random.uniform(delay / 2, delay) # Jitter so retrying writers don't collide again
+            _record_metric("retries")
+            _record_metric("retry_wait_seconds", delay)
+            time.sleep(delay)
+
+def _create_account_tables(cursor):
+    """Creates the users and sellers tables (always in the global DB_NAME file)."""
     # 1. Users Table (for email/password login)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -39,6 +290,8 @@ def initialize_db():
         );
     """)
 
+def _create_catalog_tables(cursor):
+    """Creates the products, orders and order_items tables (in DB_NAME or in each shard)."""
     # 3. Products Table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS products (
@@ -49,6 +302,8 @@ def initialize_db():
             stock INTEGER NOT NULL,
             seller_id TEXT,
             image_format TEXT,
+            image_hash TEXT, -- SHA-256 of the image in the content-addressed store
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY(seller_id) REFERENCES sellers(id)
         );
     """)
@@ -60,10 +315,72 @@ def initialize_db():
             buyer_id TEXT NOT NULL,
             total REAL NOT NULL,
             status TEXT NOT NULL,
-            payment_ref TEXT
+            payment_ref TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # 5. Order Items Table (line items, used by the sales reports)
+    # Seller and product name are copied at sale time, so items never need a
+    # join against products (which may live in another shard).
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            seller_id TEXT,
+            product_name TEXT,
+            quantity INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            FOREIGN KEY(order_id) REFERENCES orders(id),
+            FOREIGN KEY(product_id) REFERENCES products(id)
         );
     """)
 
+    # Indexes for the report filters (date range / seller)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_seller ON products(seller_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_items_seller ON order_items(seller_id)")
+
+def _insert_product_row(cursor, db_path, seller_id, name, description, price, stock, image_format=None, image_hash=None):
+    """Inserts a product row into db_path (inside an open transaction) and returns its id."""
+    id_sql, id_params = _new_id_sql("products", db_path)
+    cursor.execute(f"""
+        INSERT INTO products (id, name, description, price, stock, seller_id, image_format, image_hash) 
+        VALUES ({id_sql}, ?, ?, ?, ?, ?, ?, ?)
+    """, (*id_params, name, description, price, stock, seller_id, image_format, image_hash))
+    return cursor.lastrowid
+
+def initialize_db():
+    """
+    Initializes the database tables (users, sellers, products, orders) and 
+    seeds initial data if they don't exist.
+    In sharded mode, products and orders are created in every shard file instead.
+    """
+    close_db_connections()
+    invalidate_seller_status()
+    db_paths = [DB_NAME] + (catalog_db_paths() if SHARD_COUNT else [])
+    for db_path in db_paths:
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    for db_path in db_paths:
+        conn = get_db_connection(db_path)
+        cursor = conn.cursor()
+        # WAL lets the read-only connections keep reading while a write is in progress
+        cursor.execute("PRAGMA journal_mode=WAL")
+        if db_path == DB_NAME:
+            _create_account_tables(cursor)
+        if db_path in catalog_db_paths():
+            _create_catalog_tables(cursor)
+        conn.commit()
+        conn.close()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
     # --- Seed Initial Data ---
     if cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
         # Test Accounts: Password is 'passw123' for all
@@ -77,85 +394,144 @@ def initialize_db():
     if cursor.execute("SELECT COUNT(*) FROM sellers").fetchone()[0] == 0:
         cursor.execute("INSERT INTO sellers VALUES (?, ?, ?)", ("S999", "Approved Seller", "approved"))
         cursor.execute("INSERT INTO sellers VALUES (?, ?, ?)", ("S001", "Pending Seller", "pending"))
-    
-    if cursor.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0:
-        cursor.execute("INSERT INTO products (name, price, stock, seller_id) VALUES (?, ?, ?, ?)", 
-                       ("Blue Denim", 49.99, 10, "S999"))
-        cursor.execute("INSERT INTO products (name, price, stock, seller_id) VALUES (?, ?, ?, ?)", 
-                       ("Cotton Tee", 19.50, 50, "S999"))
-        cursor.execute("INSERT INTO products (name, price, stock, seller_id) VALUES (?, ?, ?, ?)", 
-                       ("Leather Jacket", 199.99, 5, "S999"))
 
     conn.commit()
     conn.close()
+
+    def seed_products(cursor, db_path):
+        if cursor.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0:
+            _insert_product_row(cursor, db_path, "S999", "Blue Denim", None, 49.99, 10)
+            _insert_product_row(cursor, db_path, "S999", "Cotton Tee", None, 19.50, 50)
+            _insert_product_row(cursor, db_path, "S999", "Leather Jacket", None, 199.99, 5)
+
+    seed_path = db_path_for_key("S999")
+    run_write_transaction(seed_products, seed_path, db_path=seed_path)
     print("Database initialized with sample data.")
 
 def get_user_by_credentials(email, password):
-    """Retrieves user details based on email and password."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT user_id, role, password_hash FROM users WHERE email = ? AND password_hash = ?", 
-                   (email, password))
-    user = cursor.fetchone()
-    conn.close()
+    """
+    Retrieves user details based on email and password.
+    The seller approval status is joined in (seller_status, None for buyers), so
+    login needs a single lookup on the unique email index.
+    """
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT u.user_id, u.role, u.password_hash, s.status AS seller_status
+            FROM users u LEFT JOIN sellers s ON s.id = u.user_id
+            WHERE u.email = ? AND u.password_hash = ?
+        """, (email, password))
+        user = cursor.fetchone()
     return user
 
 def get_seller_status(seller_id):
-    """Retrieves the approval status of a seller."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT status FROM sellers WHERE id = ?", (seller_id,))
-    status = cursor.fetchone()
-    conn.close()
+    """Retrieves the approval status of a seller (cached for SELLER_STATUS_TTL_SECONDS)."""
+    now = time.monotonic()
+    with _seller_status_lock:
+        cached = _seller_status_cache.get(seller_id)
+        generation = _seller_status_generation(seller_id)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status FROM sellers WHERE id = ?", (seller_id,))
+        status = cursor.fetchone()
+
+    with _seller_status_lock:
+        # Skip the store if the seller was invalidated while we were reading:
+        # the row may predate the update that triggered the invalidation
+        if _seller_status_generation(seller_id) == generation:
+            _seller_status_cache[seller_id] = (now + SELLER_STATUS_TTL_SECONDS, status)
     return status
 
+def invalidate_seller_status(seller_id=None):
+    """Drops the cached status of one seller (or of all sellers)."""
+    with _seller_status_lock:
+        _seller_status_generations[seller_id] = _seller_status_generations.get(seller_id, 0) + 1
+        if seller_id is None:
+            _seller_status_cache.clear()
+        else:
+            _seller_status_cache.pop(seller_id, None)
+
+def _seller_status_generation(seller_id):
+    """Invalidation counters that apply to a seller. Call with _seller_status_lock held."""
+    return (_seller_status_generations.get(None, 0), _seller_status_generations.get(seller_id, 0))
+
+def update_seller_status(seller_id, status):
+    """Sets a seller's approval status ('approved' or 'pending')."""
+    def work(cursor):
+        cursor.execute("UPDATE sellers SET status = ? WHERE id = ?", (status, seller_id))
+        return cursor.rowcount > 0
+
+    try:
+        updated = run_write_transaction(work)
+    finally:
+        invalidate_seller_status(seller_id)
+    change_events.publish(change_events.SELLERS, seller_id)
+    return updated
+
+def _query_catalog(query, params=()):
+    """Runs a product query on every catalog file in parallel and merges the rows by id DESC."""
+    def run(db_path):
+        with read_connection(db_path) as conn:
+            return conn.execute(query, params).fetchall()
+
+    results = fan_out(run)
+    if len(results) == 1:
+        return results[0]
+    return list(heapq.merge(*results, key=lambda row: row["id"], reverse=True))
+
 def get_all_products():
     """Retrieves all products with stock > 0."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, price, stock FROM products WHERE stock > 0 ORDER BY id DESC")
-    products = cursor.fetchall()
-    conn.close()
-    return products
+    return _query_catalog("SELECT id, name, price, stock, image_hash FROM products WHERE stock > 0 ORDER BY id DESC")
+
+def search_products(term):
+    """Retrieves in-stock products whose name contains the search term."""
+    return _query_catalog("SELECT id, name, price, stock, image_hash FROM products "
+                          "WHERE stock > 0 AND name LIKE ? ORDER BY id DESC", (f"%{term}%",))
+
+def get_products_by_ids(product_ids):
+    """Retrieves catalog rows (as in get_all_products, including sold-out ones) for the given ids."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+    placeholders = ", ".join("?" for _ in product_ids)
+    return _query_catalog("SELECT id, name, price, stock, image_hash FROM products "
+                          f"WHERE id IN ({placeholders}) ORDER BY id DESC", product_ids)
 
 def get_product_details(product_id):
     """Retrieves details for a single product."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, stock, price FROM products WHERE id = ?", (product_id,))
-    product = cursor.fetchone()
-    conn.close()
+    with read_connection(db_path_for_id(product_id)) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name, stock, price FROM products WHERE id = ?", (product_id,))
+        product = cursor.fetchone()
     return product
 
-def insert_product(seller_id, name, description, price, stock, image_format):
-    """Inserts a new product into the database."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO products (name, description, price, stock, seller_id, image_format) 
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (name, description, round(price, 2), stock, seller_id, image_format.upper()))
-    product_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+def insert_product(seller_id, name, description, price, stock, image_format, image_hash=None):
+    """Inserts a new product into the database (the seller's shard in sharded mode)."""
+    db_path = db_path_for_key(seller_id)
+
+    def work(cursor):
+        return _insert_product_row(cursor, db_path, seller_id, name, description, round(price, 2), stock,
+                                   image_format.upper(), image_hash)
+
+    product_id = run_write_transaction(work, db_path=db_path)
+    change_events.publish(change_events.PRODUCTS, product_id)
     return product_id
 
 def update_product_stock(product_id, quantity_change):
     """Updates the stock of a product (positive for adding, negative for subtracting)."""
-    product = get_product_details(product_id)
-    if product:
-        new_stock = product["stock"] + quantity_change
-        final_stock = max(0, new_stock)
-
-        # Update the DB
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE products SET stock = ? WHERE id = ?", (final_stock, product_id))
-        conn.commit()
-        conn.close()
+    def work(cursor):
+        # Read-modify-write happens inside SQLite, so concurrent updates are not lost
+        cursor.execute("UPDATE products SET stock = MAX(0, stock + ?) WHERE id = ?", 
+                       (quantity_change, product_id))
+        return cursor.rowcount > 0
 
-        return True
-    return False
+    updated = run_write_transaction(work, db_path=db_path_for_id(product_id))
+    if updated:
+        change_events.publish(change_events.STOCK, product_id)
+    return updated
 
 
 def finalize_order(buyer_id, total_amount, payment_ref, order_items):
@@ -163,9 +539,10 @@ def finalize_order(buyer_id, total_amount, payment_ref, order_items):
     Inserts a new order and updates product stock in a single transaction.
     Returns the new order ID.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
+    if SHARD_COUNT:
+        return _finalize_sharded_order(buyer_id, total_amount, payment_ref, order_items)
+
+    def work(cursor):
         # 1. Insert Order
         cursor.execute("""
             INSERT INTO orders (buyer_id, total, status, payment_ref) 
@@ -173,15 +550,189 @@ def finalize_order(buyer_id, total_amount, payment_ref, order_items):
         """, (buyer_id, round(total_amount, 2), "Pending", payment_ref))
         order_id = cursor.lastrowid
         
-        # 2. Update Stock for each item
+        # 2. Record line items and update Stock for each item
         for item in order_items:
-            cursor.execute("UPDATE products SET stock = stock - ? WHERE id = ?", 
+            cursor.execute("""
+                INSERT INTO order_items (order_id, product_id, seller_id, product_name, quantity, unit_price)
+                SELECT ?, id, seller_id, name, ?, price FROM products WHERE id = ?
+            """, (order_id, item["quantity"], item["product_id"]))
+            # Clamped at zero like update_product_stock()
+            cursor.execute("UPDATE products SET stock = MAX(0, stock - ?) WHERE id = ?", 
                            (item["quantity"], item["product_id"]))
-            
-        conn.commit()
         return order_id
-    except Exception as e:
-        conn.rollback()
-        raise e
+
+    order_id = run_write_transaction(work)
+    _publish_order(order_id, [item["product_id"] for item in order_items])
+    return order_id
+
+def _publish_order(order_id, product_ids):
+    """Announces a committed order and the stock changes it caused."""
+    change_events.publish(change_events.ORDERS, order_id)
+    for product_id in product_ids:
+        change_events.publish(change_events.STOCK, product_id)
+
+def _finalize_sharded_order(buyer_id, total_amount, payment_ref, order_items):
+    """
+    Sharded finalize_order: the order and its items go to the buyer's shard in one
+    transaction, then stock is decremented in each product's shard. SQLite cannot
+    commit atomically across WAL files, so the stock updates are separate transactions.
+    """
+    lines = []
+    for item in order_items:
+        with read_connection(db_path_for_id(item["product_id"])) as conn:
+            product = conn.execute("SELECT id, name, seller_id, price FROM products WHERE id = ?",
+                                   (item["product_id"],)).fetchone()
+        if product:
+            lines.append((product, item["quantity"]))
+
+    order_db = db_path_for_key(buyer_id)
+
+    def insert_order(cursor):
+        id_sql, id_params = _new_id_sql("orders", order_db)
+        cursor.execute(f"""
+            INSERT INTO orders (id, buyer_id, total, status, payment_ref) 
+            VALUES ({id_sql}, ?, ?, ?, ?)
+        """, (*id_params, buyer_id, round(total_amount, 2), "Pending", payment_ref))
+        order_id = cursor.lastrowid
+        for product, quantity in lines:
+            cursor.execute("""
+                INSERT INTO order_items (order_id, product_id, seller_id, product_name, quantity, unit_price)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (order_id, product["id"], product["seller_id"], product["name"], quantity, product["price"]))
+        return order_id
+
+    order_id = run_write_transaction(insert_order, db_path=order_db)
+
+    def decrement_stock(cursor, product_id, quantity):
+        cursor.execute("UPDATE products SET stock = MAX(0, stock - ?) WHERE id = ?", (quantity, product_id))
+
+    for product, quantity in lines:
+        run_write_transaction(decrement_stock, product["id"], quantity, db_path=db_path_for_id(product["id"]))
+    _publish_order(order_id, [product["id"] for product, _ in lines])
+    return order_id
+
+def check_external_changes():
+    """
+    Publishes a catch-all product/stock change if another process committed to a
+    catalog file since the last call. Cheap enough to poll from the GUI loop.
+    PRAGMA data_version is read on the writer connection: it only moves for commits
+    made by other connections, and all of this process's writes use that connection.
+    """
+    _check_pool_owner()
+    changed = False
+    for db_path in catalog_db_paths():
+        lock = _writer_lock_for(db_path)
+        if not lock.acquire(blocking=False):
+            continue # A local write is in progress; check again on the next poll
+        try:
+            conn = _get_writer_connection(db_path)
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            lock.release()
+
+        seen = _seen_data_versions.get(db_path)
+        # data_version values are only comparable on the same connection
+        if seen and seen[0] is conn and seen[1] != version:
+            changed = True
+        _seen_data_versions[db_path] = (conn, version)
+
+    if changed:
+        change_events.publish(change_events.PRODUCTS)
+        change_events.publish(change_events.STOCK)
+    return changed
+
+# =================================================================
+# REPORTS (streamed straight from the cursor)
+# =================================================================
+
+def stream_query(query, params=(), batch_size=REPORT_FETCH_SIZE, db_path=None):
+    """
+    Generator that yields the column names first, then each row as a tuple.
+    Rows are pulled with fetchmany() so memory stays flat on large tables.
+    Uses its own read-only connection so a long export doesn't hold a pooled one.
+    """
+    conn = get_read_connection(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        yield tuple(col[0] for col in cursor.description)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield tuple(row)
     finally:
         conn.close()
+
+def _merge_report_streams(query, params, key, db_paths=None):
+    """Streams a report query from every catalog file, merged in order by key (one header row)."""
+    streams = [stream_query(query, params, db_path=path) for path in db_paths or catalog_db_paths()]
+    if len(streams) == 1:
+        yield from streams[0]
+        return
+    for stream in streams:
+        header = next(stream)
+    yield header
+    yield from heapq.merge(*streams, key=key)
+
+def _report_filters(date_column, seller_column, date_from, date_to, seller_id):
+    """Builds the WHERE clause and parameters shared by the report queries."""
+    clauses = []
+    params = []
+    if date_from:
+        clauses.append(f"{date_column} >= ?")
+        params.append(date_from)
+    if date_to:
+        # Inclusive end date: everything before the start of the next day
+        clauses.append(f"{date_column} < date(?, '+1 day')")
+        params.append(date_to)
+    if seller_id:
+        clauses.append(seller_column)
+        params.append(seller_id)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+def stream_products_report(date_from=None, date_to=None, seller_id=None):
+    """Streams the product catalog, optionally filtered by creation date and seller."""
+    where, params = _report_filters("created_at", "seller_id = ?", date_from, date_to, seller_id)
+    query = ("SELECT id, name, description, price, stock, seller_id, image_format, image_hash, created_at "
+             "FROM products" + where + " ORDER BY id")
+    # A seller's products all live in one shard
+    db_paths = [db_path_for_key(seller_id)] if seller_id else None
+    return _merge_report_streams(query, params, key=lambda row: row[0], db_paths=db_paths)
+
+def stream_orders_report(date_from=None, date_to=None, seller_id=None):
+    """Streams orders; the seller filter keeps orders containing that seller's items."""
+    seller_clause = "EXISTS (SELECT 1 FROM order_items oi WHERE oi.order_id = o.id AND oi.seller_id = ?)"
+    where, params = _report_filters("o.created_at", seller_clause, date_from, date_to, seller_id)
+    query = ("SELECT o.id, o.buyer_id, o.total, o.status, o.payment_ref, o.created_at "
+             "FROM orders o" + where + " ORDER BY o.id")
+    return _merge_report_streams(query, params, key=lambda row: row[0])
+
+def stream_sales_report(date_from=None, date_to=None, seller_id=None):
+    """Streams units sold and revenue per seller and product."""
+    where, params = _report_filters("o.created_at", "oi.seller_id = ?", date_from, date_to, seller_id)
+    query = ("SELECT oi.seller_id, oi.product_id, MAX(oi.product_name) AS product_name, "
+             "COUNT(DISTINCT oi.order_id) AS orders, SUM(oi.quantity) AS units_sold, "
+             "ROUND(SUM(oi.quantity * oi.unit_price), 2) AS revenue "
+             "FROM order_items oi "
+             "JOIN orders o ON o.id = oi.order_id" + where +
+             " GROUP BY oi.seller_id, oi.product_id ORDER BY oi.seller_id, oi.product_id")
+    rows = _merge_report_streams(query, params, key=lambda row: (row[0] or "", row[1]))
+    return _combine_sales_rows(rows)
+
+def _combine_sales_rows(rows):
+    """Sums the per-shard aggregates of the same seller/product (rows arrive sorted by that key)."""
+    yield next(rows)
+    current = None
+    for row in rows:
+        if current and row[:2] == current[:2]:
+            # Orders live in exactly one shard, so per-shard order counts can be added
+            current = current[:3] + (current[3] + row[3], current[4] + row[4], round(current[5] + row[5], 2))
+        else:
+            if current:
+                yield current
+            current = row
+    if current:
+        yield current
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+IMAGE_STORE_DIR = "product_images"
+THUMBNAIL_DIR = os.path.join(IMAGE_STORE_DIR, "thumbs")
+THUMBNAIL_SIZE = (64, 64)
+HASH_CHUNK_SIZE = 1024 * 1024 # Images are hashed 1MB at a time
+THUMBNAIL_WORKERS = 2
+
+_thumbnail_pool = None
+
+# =================================================================
+# CONTENT-ADDRESSED STORE
+# =================================================================
+
+def hash_image_file(path):
+    """Returns the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stored_image_path(image_hash):
+    """Location of an image in the store (fanned out by the first two hex digits)."""
+    return os.path.join(IMAGE_STORE_DIR, image_hash[:2], image_hash)
+
+def thumbnail_path(image_hash):
+    """Location of the catalog thumbnail for an image."""
+    return os.path.join(THUMBNAIL_DIR, f"{image_hash}.png")
+
+def _atomic_write(dest, write):
+    """Writes through a temp file in the destination folder, then renames into place."""
+    directory = os.path.dirname(dest)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            write(tmp)
+        os.replace(tmp_path, dest)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def store_image(path):
+    """
+    Copies an uploaded image into the store.
+    Identical images are only stored once.
+    Returns: the image hash and whether this call added the file.
+    """
+    image_hash = hash_image_file(path)
+    dest = stored_image_path(image_hash)
+    if os.path.exists(dest):
+        return image_hash, False
+
+    def copy(tmp):
+        with open(path, "rb") as src:
+            shutil.copyfileobj(src, tmp, HASH_CHUNK_SIZE)
+    _atomic_write(dest, copy)
+    return image_hash, True
+
+def discard_image(image_hash):
+    """Removes a stored image (used when the product it was stored for is not created)."""
+    dest = stored_image_path(image_hash)
+    if os.path.exists(dest):
+        os.remove(dest)
+
+# =================================================================
+# THUMBNAILS (generated on a worker pool)
+# =================================================================
+
+def generate_thumbnail(image_hash):
+    """Creates the thumbnail for a stored image. Returns its path, or None if unavailable."""
+    dest = thumbnail_path(image_hash)
+    if os.path.exists(dest):
+        return dest
+    source = stored_image_path(image_hash)
+    try:
+        from PIL import Image # Optional and heavy: imported on the first thumbnail only
+    except ImportError:
+        return None # Thumbnails are skipped when Pillow is missing
+    if not os.path.exists(source):
+        return None
+
+    with Image.open(source) as img:
+        img.thumbnail(THUMBNAIL_SIZE)
+        _atomic_write(dest, lambda tmp: img.save(tmp, format="PNG"))
+    return dest
+
+def request_thumbnail(image_hash):
+    """Queues thumbnail generation and returns a Future resolving to the thumbnail path."""
+    global _thumbnail_pool
+    if _thumbnail_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _thumbnail_pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+    return _thumbnail_pool.submit(generate_thumbnail, image_hash)
@@ -2,25 +2,54 @@ import tkinter as tk
 from tkinter import messagebox
 from functools import partial
 import os
+import queue
+import threading
+from collections import OrderedDict
 from tkinter import filedialog
 
 # Import modules
-from db_operations import initialize_db, get_all_products, get_product_details
+from db_operations import (
+    initialize_db, get_all_products, get_product_details, get_products_by_ids, check_external_changes
+)
+import change_events
 from system_logic import (
     CART, CURRENT_USER, api_login_user, api_logout_user, 
     api_add_to_cart, api_checkout, api_add_product
 )
+from image_store import thumbnail_path, request_thumbnail
 
 # --- Tkinter GUI Setup ---
-ROOT = tk.Tk()
-ROOT.title("Mini Fashion E-commerce")
-ROOT.geometry("800x400")
+# Widgets are created by build_gui() when the app starts, so this module can be
+# imported without a display (tests, scripts, servers).
+ROOT = None
 
 # --- Frames (Containers for different views) ---
-login_frame = tk.Frame(ROOT)
-buyer_frame = tk.Frame(ROOT)
-cart_frame = tk.Frame(ROOT)
-seller_frame = tk.Frame(ROOT)
+login_frame = None
+buyer_frame = None
+cart_frame = None
+seller_frame = None
+product_list_container = None # Frame for the product list (scrollable container)
+
+# --- Change Notifications ---
+# Write paths publish change events; the GUI drains them once per frame and
+# redraws only the affected rows. External writes are detected by polling.
+FRAME_INTERVAL_MS = 50
+EXTERNAL_POLL_MS = 1000
+
+def build_gui():
+    """Creates the Tk root window and the view frames."""
+    global ROOT, login_frame, buyer_frame, cart_frame, seller_frame, product_list_container
+    ROOT = tk.Tk()
+    ROOT.title("Mini Fashion E-commerce")
+    ROOT.geometry("800x400")
+
+    login_frame = tk.Frame(ROOT)
+    buyer_frame = tk.Frame(ROOT)
+    cart_frame = tk.Frame(ROOT)
+    seller_frame = tk.Frame(ROOT)
+
+    product_list_container = tk.Frame(buyer_frame)
+    product_list_container.pack(fill='both', expand=True, padx=10, pady=10)
 
 def show_frame(frame):
     """Hides all frames and shows the selected frame."""
@@ -88,9 +117,43 @@ def setup_login_frame():
 # 2. Buyer View (Catalog)
 # =================================================================
 
-# Frame for the product list (scrollable container)
-product_list_container = tk.Frame(buyer_frame)
-product_list_container.pack(fill='both', expand=True, padx=10, pady=10)
+# Decoded catalog thumbnails (PhotoImage objects), least recently used evicted first
+THUMBNAIL_CACHE = OrderedDict()
+THUMBNAIL_CACHE_SIZE = 128
+
+def get_cached_thumbnail(image_hash):
+    """Returns the decoded thumbnail for an image, or None if it is not generated yet."""
+    if image_hash in THUMBNAIL_CACHE:
+        THUMBNAIL_CACHE.move_to_end(image_hash)
+        return THUMBNAIL_CACHE[image_hash]
+
+    path = thumbnail_path(image_hash)
+    if not os.path.exists(path):
+        return None
+    image = tk.PhotoImage(file=path)
+    THUMBNAIL_CACHE[image_hash] = image
+    if len(THUMBNAIL_CACHE) > THUMBNAIL_CACHE_SIZE:
+        THUMBNAIL_CACHE.popitem(last=False)
+    return image
+
+def load_thumbnail_later(label, image_hash):
+    """Generates the thumbnail on the worker pool and fills the label once it is ready."""
+    future = request_thumbnail(image_hash)
+
+    def poll():
+        if not future.done():
+            ROOT.after(100, poll)
+            return
+        if future.exception() is None and future.result() and label.winfo_exists():
+            image = get_cached_thumbnail(image_hash)
+            if image:
+                label.config(image=image, text="", width=0)
+                label.image = image # Survives eviction from THUMBNAIL_CACHE while shown
+    ROOT.after(100, poll)
+
+# Widgets of the drawn catalog, so changes can be applied row by row
+CATALOG_WIDGETS = {} # "cart_info" label and "cart_button"
+CATALOG_ROWS = {} # {product_id: {"frame": row frame, "stock": stock label, "stock_value": stock drawn}}
 
 def refresh_buyer_view():
     """Fetches products and updates the buyer interface."""
@@ -98,25 +161,26 @@ def refresh_buyer_view():
     # Clear previous contents of the container
     for widget in product_list_container.winfo_children():
         widget.destroy()
+    CATALOG_ROWS.clear()
 
     tk.Label(product_list_container, text="Product Catalog", font=('Arial', 16, 'bold')).pack(pady=10)
     
-    cart_info = f"Cart Items: {sum(CART.values())} | "
-    cart_info += "Logged in as Buyer ID " + str(CURRENT_USER.get('id', 'N/A'))
-    
-    tk.Label(product_list_container, text=cart_info, fg='blue').pack()
+    CATALOG_WIDGETS["cart_info"] = tk.Label(product_list_container, fg='blue')
+    CATALOG_WIDGETS["cart_info"].pack()
     
     button_frame = tk.Frame(product_list_container)
     button_frame.pack(pady=5)
 
-    tk.Button(button_frame, text=f"View Cart ({sum(CART.values())})", 
-              command=refresh_cart_view, bg="#FFC107", padx=10, pady=5).pack(side='left', padx=10)
+    CATALOG_WIDGETS["cart_button"] = tk.Button(button_frame, command=refresh_cart_view, bg="#FFC107", padx=10, pady=5)
+    CATALOG_WIDGETS["cart_button"].pack(side='left', padx=10)
+    update_cart_summary()
     # tk.Button(button_frame, text="Logout", 
     #           command=handle_logout).pack(side='left', padx=10)
     
     # Product Grid Header
     header_frame = tk.Frame(product_list_container, relief=tk.RIDGE, bd=2)
     header_frame.pack(fill='x', pady=5)
+    tk.Label(header_frame, text="Image", font=('Arial', 10, 'bold'), width=8).pack(side='left', padx=5)
     tk.Label(header_frame, text="Name", font=('Arial', 10, 'bold'), width=20, anchor='w').pack(side='left', padx=5)
     tk.Label(header_frame, text="Price", font=('Arial', 10, 'bold'), width=10).pack(side='left', padx=5)
     tk.Label(header_frame, text="Stock", font=('Arial', 10, 'bold'), width=8).pack(side='left', padx=5)
@@ -125,18 +189,77 @@ def refresh_buyer_view():
     products = get_all_products()
     
     for product in products:
-        p_id = product["id"]
-        product_frame = tk.Frame(product_list_container, bd=1, relief=tk.GROOVE)
+        add_product_row(product)
+
+def update_cart_summary():
+    """Updates the cart count labels of the catalog without re-querying products."""
+    if not CATALOG_WIDGETS:
+        return
+    cart_info = f"Cart Items: {sum(CART.values())} | "
+    cart_info += "Logged in as Buyer ID " + str(CURRENT_USER.get('id', 'N/A'))
+    CATALOG_WIDGETS["cart_info"].config(text=cart_info)
+    CATALOG_WIDGETS["cart_button"].config(text=f"View Cart ({sum(CART.values())})")
+
+def add_product_row(product, before=None):
+    """Draws one catalog row; rows are kept in id DESC order."""
+    p_id = product["id"]
+    product_frame = tk.Frame(product_list_container, bd=1, relief=tk.GROOVE)
+    if before is not None:
+        product_frame.pack(fill='x', pady=2, before=before)
+    else:
         product_frame.pack(fill='x', pady=2)
-        
-        tk.Label(product_frame, text=product["name"], width=25, anchor='w').pack(side='left', padx=5)
-        tk.Label(product_frame, text=f"${product['price']:.2f}", width=10).pack(side='left', padx=5)
-        tk.Label(product_frame, text=product["stock"], width=10).pack(side='left', padx=5)
-        
-        btn_add = tk.Button(product_frame, text="Add to Cart", 
-                            command=partial(handle_add_to_cart, p_id),
-                            bg="#2196F3", fg="white")
-        btn_add.pack(side='left', padx=5)
+
+    image_label = tk.Label(product_frame, text="-", width=8)
+    image_label.pack(side='left', padx=5)
+    image_hash = product["image_hash"]
+    if image_hash:
+        thumbnail = get_cached_thumbnail(image_hash)
+        if thumbnail:
+            image_label.config(image=thumbnail, text="", width=0)
+            image_label.image = thumbnail # Keep a reference: Tk drops the image once Python does
+        else:
+            load_thumbnail_later(image_label, image_hash)
+    
+    tk.Label(product_frame, text=product["name"], width=25, anchor='w').pack(side='left', padx=5)
+    tk.Label(product_frame, text=f"${product['price']:.2f}", width=10).pack(side='left', padx=5)
+    stock_label = tk.Label(product_frame, text=product["stock"], width=10)
+    stock_label.pack(side='left', padx=5)
+    
+    btn_add = tk.Button(product_frame, text="Add to Cart", 
+                        command=partial(handle_add_to_cart, p_id),
+                        bg="#2196F3", fg="white")
+    btn_add.pack(side='left', padx=5)
+
+    CATALOG_ROWS[p_id] = {"frame": product_frame, "stock": stock_label, "stock_value": product["stock"]}
+
+def on_catalog_changed(product_ids):
+    """Applies product/stock change events to the drawn catalog, touching only the affected rows."""
+    if not CATALOG_WIDGETS:
+        return # Catalog not drawn yet; it is built from fresh data on first view
+    if product_ids is None:
+        # Unknown (external) change: re-query and update only the rows that differ
+        products = get_all_products()
+        listed = {product["id"] for product in products}
+        for p_id in [p_id for p_id in CATALOG_ROWS if p_id not in listed]:
+            CATALOG_ROWS.pop(p_id)["frame"].destroy()
+    else:
+        products = get_products_by_ids(product_ids)
+
+    for product in products:
+        p_id = product["id"]
+        row = CATALOG_ROWS.get(p_id)
+        if product["stock"] <= 0:
+            # The catalog only lists products in stock
+            if row:
+                row["frame"].destroy()
+                del CATALOG_ROWS[p_id]
+        elif row:
+            if row["stock_value"] != product["stock"]:
+                row["stock"].config(text=product["stock"])
+                row["stock_value"] = product["stock"]
+        else:
+            older = [other_id for other_id in CATALOG_ROWS if other_id < p_id]
+            add_product_row(product, before=CATALOG_ROWS[max(older)]["frame"] if older else None)
 
 def handle_add_to_cart(product_id):
     """Wrapper to handle GUI response after adding to cart."""
@@ -147,18 +270,28 @@ def handle_add_to_cart(product_id):
     else:
         messagebox.showerror("Error", result["message"])
         
-    refresh_buyer_view() # Update cart count and stock
+    update_cart_summary() # Stock is unchanged; stock events update the rows
 
 # =================================================================
 # 3. Cart View
 # =================================================================
 
+# Cart contents the cart view was last drawn for (None forces a redraw), and the
+# product values it showed: {product_id: (name, price), or None if not found}
+CART_VIEW_STATE = {"drawn_for": None, "products": {}}
+
 def refresh_cart_view():
     """Updates and shows the cart and checkout interface."""
     show_frame(cart_frame)
+
+    snapshot = tuple(CART.items())
+    if CART_VIEW_STATE["drawn_for"] == snapshot:
+        return # Nothing changed since the last draw; keep the entered card details
+    CART_VIEW_STATE["drawn_for"] = snapshot
     
     for widget in cart_frame.winfo_children():
         widget.destroy()
+    drawn = CART_VIEW_STATE["products"] = {}
         
     tk.Label(cart_frame, text="Shopping Cart", font=('Arial', 18, 'bold')).pack(pady=20)
     
@@ -180,6 +313,7 @@ def refresh_cart_view():
     
     for p_id, qty in CART.items():
         product = get_product_details(p_id)
+        drawn[p_id] = (product["name"], product["price"]) if product else None
         
         if product:
             price = product["price"]
@@ -228,6 +362,23 @@ def refresh_cart_view():
               
     tk.Button(cart_frame, text="Back to Browsing", command=lambda: show_frame(buyer_frame)).pack()
 
+def on_cart_products_changed(product_ids):
+    """Redraws the cart view only when a product it shows has a different name or price."""
+    if CART_VIEW_STATE["drawn_for"] is None:
+        return # Not drawn (or already stale); the next view draws from fresh data
+    drawn = CART_VIEW_STATE["products"]
+    changed_ids = list(drawn) if product_ids is None else [p_id for p_id in product_ids if p_id in drawn]
+    if not changed_ids:
+        return
+
+    current = dict.fromkeys(changed_ids)
+    for product in get_products_by_ids(changed_ids):
+        current[product["id"]] = (product["name"], product["price"])
+    if any(drawn[p_id] != current[p_id] for p_id in changed_ids):
+        CART_VIEW_STATE["drawn_for"] = None
+        if cart_frame.winfo_ismapped():
+            refresh_cart_view()
+
 def handle_checkout(card_number, cvc):
     """
     Wrapper to handle GUI response after checkout.
@@ -239,7 +390,7 @@ def handle_checkout(card_number, cvc):
     
     if result["status"] == "success":
         messagebox.showinfo("Order Success", f"{result['message']}")
-        refresh_buyer_view() # Clears cart and updates stock view
+        update_cart_summary() # Stock rows are updated by the change events
         show_frame(buyer_frame)
     else:
         # Show specific error message from the API simulation
@@ -250,8 +401,16 @@ def handle_checkout(card_number, cvc):
 # 4. Seller View
 # =================================================================
 
+# Seller the dashboard widgets were built for
+SELLER_FRAME_STATE = {"seller_id": None}
+
 def setup_seller_frame():
     """Sets up the seller dashboard for UC-01 Add Product."""
+    seller_id = CURRENT_USER.get('id')
+    if SELLER_FRAME_STATE["seller_id"] == seller_id and seller_frame.winfo_children():
+        return # Already built for this seller; nothing on the form depends on the database
+    SELLER_FRAME_STATE["seller_id"] = seller_id
+
     for widget in seller_frame.winfo_children():
         widget.destroy()
         
@@ -274,6 +433,7 @@ def setup_seller_frame():
 
     tk.Label(seller_frame, text="Upload Product Image (JPG/PNG, ≤ 5MB)").pack()
     image_path_var = tk.StringVar()
+    selected_image = {} # path, ext and size_mb of the validated selection
 
     def select_image():
         filepath = filedialog.askopenfilename(
@@ -281,21 +441,48 @@ def setup_seller_frame():
             filetypes=[("Image Files", "*.jpg *.jpeg *.png")]
         )
         if filepath:
-            size_mb = os.path.getsize(filepath) / (1024 * 1024)
             ext = os.path.splitext(filepath)[1].lower()
-            
             if ext not in [".jpg", ".jpeg", ".png"]:
                 messagebox.showerror("Invalid Format", "Only JPG or PNG images are allowed.")
                 return
+
+            size_mb = os.path.getsize(filepath) / (1024 * 1024)
             if size_mb > 5:
                 messagebox.showerror("File Too Large", "Image must not exceed 5MB.")
                 return
             
+            selected_image.update(path=filepath, ext=ext, size_mb=size_mb)
             image_path_var.set(filepath)
             messagebox.showinfo("Image Selected", f"File selected: {os.path.basename(filepath)}")
 
     tk.Button(seller_frame, text="Select Image", command=select_image, bg="#607D8B", fg="white").pack(pady=5)
 
+    results = queue.Queue()
+
+    def poll_add_product():
+        """Shows the outcome once the worker thread has finished, without blocking Tk."""
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            ROOT.after(100, poll_add_product)
+            return
+        add_button.config(state=tk.NORMAL)
+
+        if result["status"] == "success":
+            messagebox.showinfo("Success", result["message"])
+            # Clear fields after success
+            name_entry.delete(0, tk.END)
+            price_entry.delete(0, tk.END)
+            price_entry.insert(0, "50.00")
+            stock_entry.delete(0, tk.END)
+            stock_entry.insert(0, "10")
+            image_path_var.set("")
+            selected_image.clear()
+            if result.get("image_hash"):
+                request_thumbnail(result["image_hash"]) # Warm the catalog thumbnail in the background
+        else:
+            messagebox.showerror("Failure", result["message"])
+
     def do_add_product():
         """Handles input validation and calls the API function."""
         try:
@@ -304,52 +491,138 @@ def setup_seller_frame():
             stock = int(stock_entry.get())
             image_path = image_path_var.get()
             
-            if not image_path:
+            if not image_path or selected_image.get("path") != image_path:
                 messagebox.showerror("Missing Image", "Please select an image for the product.")
                 return
             
-            size_mb = os.path.getsize(image_path) / (1024 * 1024)
-            ext = os.path.splitext(image_path)[1].lower()
-            if ext not in [".jpg", ".jpeg", ".png"]:
-                messagebox.showerror("Invalid Format", "Only JPG or PNG images are allowed.")
-                return
-            if size_mb > 5:
-                messagebox.showerror("File Too Large", "Image must not exceed 5MB.")
-                return
-            
-            result = api_add_product(name, "GUI-Added Product", price, stock, ext.upper(), round(size_mb, 2))
-            
-            if result["status"] == "success":
-                messagebox.showinfo("Success", result["message"])
-                # Clear fields after success
-                name_entry.delete(0, tk.END)
-                price_entry.delete(0, tk.END)
-                price_entry.insert(0, "50.00")
-                stock_entry.delete(0, tk.END)
-                stock_entry.insert(0, "10")
-                image_path_var.set("")
-            else:
-                messagebox.showerror("Failure", result["message"])
-                
+            # Already validated in select_image(), no need to stat the file again
+            size_mb = selected_image["size_mb"]
+            ext = selected_image["ext"]
         except ValueError:
             messagebox.showerror("Input Error", "Price must be a decimal number and Stock must be a whole integer.")
+            return
+
+        # Hashing and copying the image happen in api_add_product, off the Tk thread
+        def worker():
+            try:
+                result = api_add_product(name, "GUI-Added Product", price, stock, ext.upper(), round(size_mb, 2), image_path)
+            except Exception as e:
+                result = {"status": "fatal_error", "message": f"Product could not be added: {e}"}
+            results.put(result)
+
+        add_button.config(state=tk.DISABLED)
+        threading.Thread(target=worker, name="add-product", daemon=True).start()
+        ROOT.after(100, poll_add_product)
+
+    add_button = tk.Button(seller_frame, text="Add Product", command=do_add_product,
+                           bg="#FF9800", fg="white", padx=10, pady=5)
+    add_button.pack(pady=15)
+
+    setup_report_export(seller_frame)
+
+def setup_report_export(parent):
+    """Adds the report export controls; exports run on a background thread."""
+    from report_export import export_report_in_background, REPORT_SOURCES, REPORT_FORMATS
+
+    export_frame = tk.Frame(parent, relief=tk.RIDGE, bd=2)
+    export_frame.pack(pady=10, padx=20)
 
-    tk.Button(seller_frame, text="Add Product", command=do_add_product,
-              bg="#FF9800", fg="white", padx=10, pady=5).pack(pady=15)
+    tk.Label(export_frame, text="Export Reports", font=('Arial', 12, 'bold')).pack(side='top', pady=5)
+
+    kind_var = tk.StringVar(value="sales")
+    tk.OptionMenu(export_frame, kind_var, *REPORT_SOURCES).pack(side='left', padx=5)
+    format_var = tk.StringVar(value="CSV")
+    tk.OptionMenu(export_frame, format_var, *REPORT_FORMATS).pack(side='left', padx=5)
+    compress_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(export_frame, text="gzip", variable=compress_var).pack(side='left', padx=5)
+
+    tk.Label(export_frame, text="From (YYYY-MM-DD):").pack(side='left', padx=5)
+    from_entry = tk.Entry(export_frame, width=11)
+    from_entry.pack(side='left', padx=5)
+    tk.Label(export_frame, text="To:").pack(side='left', padx=5)
+    to_entry = tk.Entry(export_frame, width=11)
+    to_entry.pack(side='left', padx=5)
+
+    results = queue.Queue()
+
+    def poll_export(button):
+        """Checks for the worker's result without blocking the Tk thread."""
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            ROOT.after(100, poll_export, button)
+            return
+        button.config(state=tk.NORMAL)
+        if result["status"] == "success":
+            messagebox.showinfo("Export Complete", result["message"])
+        else:
+            messagebox.showerror("Export Failed", result["message"])
+
+    def do_export():
+        export_button.config(state=tk.DISABLED)
+        export_report_in_background(
+            on_complete=results.put,
+            kind=kind_var.get(),
+            fmt=format_var.get(),
+            compress=compress_var.get(),
+            date_from=from_entry.get().strip() or None,
+            date_to=to_entry.get().strip() or None,
+            seller_id=CURRENT_USER.get("id"),
+        )
+        ROOT.after(100, poll_export, export_button)
+
+    export_button = tk.Button(export_frame, text="Export", command=do_export, bg="#607D8B", fg="white")
+    export_button.pack(side='left', padx=5)
     
 
 # =================================================================
 # MAIN EXECUTION
 # =================================================================
 
-def main():
-    """Initializes the DB and starts the GUI."""
-    initialize_db()
+def pump_change_events():
+    """Delivers the change events queued since the last frame (coalesced per topic)."""
+    try:
+        change_events.dispatch_pending()
+    except Exception as e:
+        print(f"WARNING: Delivering change events failed: {e}")
+    finally:
+        # Always reschedule, or the views stop updating for the rest of the session
+        ROOT.after(FRAME_INTERVAL_MS, pump_change_events)
+
+def poll_external_changes():
+    """Picks up writes made by other processes (e.g. another seller adding stock)."""
+    try:
+        check_external_changes()
+    except Exception as e:
+        print(f"WARNING: Checking for external changes failed: {e}")
+    finally:
+        ROOT.after(EXTERNAL_POLL_MS, poll_external_changes)
+
+def subscribe_views():
+    """Registers the views for the change events they display."""
+    for topic in (change_events.PRODUCTS, change_events.STOCK):
+        change_events.subscribe(topic, on_catalog_changed)
+        change_events.subscribe(topic, on_cart_products_changed)
+
+def start_app():
+    """Builds the GUI, shows the login screen and initializes the DB (everything before mainloop)."""
+    build_gui()
+    subscribe_views()
     
     # Setup initial view
     setup_login_frame()
     show_frame(login_frame)
-    
+
+    # Draw the login screen first, then rebuild the test database behind it
+    ROOT.update()
+    initialize_db()
+
+    ROOT.after(FRAME_INTERVAL_MS, pump_change_events)
+    ROOT.after(EXTERNAL_POLL_MS, poll_external_changes)
+
+def main():
+    """Starts the application and runs the Tk event loop."""
+    start_app()
     ROOT.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+import csv
+import gzip
+import math
+import os
+import re
+import threading
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+
+from db_operations import stream_products_report, stream_orders_report, stream_sales_report
+
+REPORTS_DIR = "reports"
+
+REPORT_SOURCES = {
+    "products": stream_products_report,
+    "orders": stream_orders_report,
+    "sales": stream_sales_report,
+}
+REPORT_FORMATS = ["CSV", "XLSX"]
+
+# =================================================================
+# WRITERS
+# =================================================================
+
+def write_csv(rows, path, compress=False):
+    """Writes the row stream to a CSV file (gzip-compressed if requested). Returns data rows written."""
+    if compress:
+        handle = gzip.open(path, "wt", newline="", encoding="utf-8")
+    else:
+        handle = open(path, "w", newline="", encoding="utf-8")
+    count = -1 # The first row is the header
+    with handle:
+        writer = csv.writer(handle)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return max(count, 0)
+
+# Minimal SpreadsheetML package. Cells use inline strings so no shared-strings
+# table has to be kept in memory while the sheet is being written.
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+
+# Control characters that XML 1.0 does not allow anywhere in a document
+_XML_INVALID_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _xlsx_cell(value):
+    """Renders a single cell as SpreadsheetML."""
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if isinstance(value, float) and not math.isfinite(value):
+            return "<c/>" # NaN/inf have no numeric cell representation
+        return f"<c><v>{value}</v></c>"
+    text = _XML_INVALID_CHARS.sub("", str(value))
+    return f'<c t="inlineStr"><is><t>{escape(text)}</t></is></c>'
+
+def write_xlsx(rows, path, sheet_name="Report"):
+    """Writes the row stream to a single-sheet XLSX file. Returns data rows written."""
+    count = -1 # The first row is the header
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        workbook.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        workbook.writestr("xl/workbook.xml", _XLSX_WORKBOOK.format(name=escape(sheet_name)))
+        workbook.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        # The sheet is streamed into the archive entry row by row
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_XLSX_SHEET_HEAD.encode("utf-8"))
+            for row in rows:
+                cells = "".join(_xlsx_cell(value) for value in row)
+                sheet.write(f"<row>{cells}</row>".encode("utf-8"))
+                count += 1
+            sheet.write(_XLSX_SHEET_TAIL.encode("utf-8"))
+    return max(count, 0)
+
+# =================================================================
+# EXPORT API
+# =================================================================
+
+def default_report_path(kind, fmt, compress=False):
+    """Returns reports/<kind>_report.<ext> (with .gz when compressed)."""
+    path = os.path.join(REPORTS_DIR, f"{kind}_report.{fmt.lower()}")
+    return path + ".gz" if compress else path
+
+def export_report(kind, fmt="CSV", path=None, compress=False, date_from=None, date_to=None, seller_id=None):
+    """
+    Streams a report (products, orders or sales) from the database into a CSV/XLSX file.
+    Dates are 'YYYY-MM-DD' strings and the range is inclusive.
+    Returns: status, message, path and number of rows written.
+    """
+    if kind not in REPORT_SOURCES:
+        return {"status": "error", "message": f"Unknown report '{kind}'. Use products, orders or sales."}
+
+    fmt = fmt.upper()
+    if fmt not in REPORT_FORMATS:
+        return {"status": "error", "message": "Only CSV/XLSX report formats allowed."}
+    if fmt == "XLSX" and compress:
+        # XLSX is already a deflated zip package
+        return {"status": "error", "message": "Compression is only available for CSV reports."}
+
+    # Normalize to YYYY-MM-DD: fromisoformat also accepts forms like "20260101",
+    # which would not compare correctly against the stored created_at text
+    try:
+        date_from = date.fromisoformat(date_from).isoformat() if date_from else None
+    except ValueError:
+        return {"status": "error", "message": "Start date must use the YYYY-MM-DD format."}
+    try:
+        date_to = date.fromisoformat(date_to).isoformat() if date_to else None
+    except ValueError:
+        return {"status": "error", "message": "End date must use the YYYY-MM-DD format."}
+    if date_from and date_to and date_from > date_to:
+        return {"status": "error", "message": "Start date must not be after end date."}
+
+    path = path or default_report_path(kind, fmt, compress)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    rows = REPORT_SOURCES[kind](date_from, date_to, seller_id)
+    try:
+        if fmt == "CSV":
+            count = write_csv(rows, path, compress)
+        else:
+            count = write_xlsx(rows, path, sheet_name=kind.capitalize())
+    except Exception as e:
+        return {"status": "fatal_error", "message": f"Report export failed: {e}"}
+
+    return {"status": "success", "message": f"Exported {count} {kind} rows to {path}.", "path": path, "rows": count}
+
+def export_report_in_background(on_complete=None, **options):
+    """
+    Runs export_report() on a daemon thread so the GUI stays responsive.
+    on_complete(result) is called from the worker thread when the export finishes.
+    """
+    def worker():
+        try:
+            result = export_report(**options)
+        except Exception as e:
+            result = {"status": "fatal_error", "message": f"Report export failed: {e}"}
+        if on_complete:
+            on_complete(result)
+
+    thread = threading.Thread(target=worker, name="report-export", daemon=True)
+    thread.start()
+    return thread
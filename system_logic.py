@@ -1,15 +1,15 @@
 import random
 import time
-import requests
 import os
-import socket
-from dotenv import load_dotenv
 from db_operations import (
-    get_user_by_credentials, get_seller_status, get_product_details, update_product_stock,
+    get_user_by_credentials, get_seller_status, get_product_details,
     insert_product, finalize_order, get_all_products
 )
+from image_store import store_image, discard_image
 
-load_dotenv()
+# The payment stack (requests, socket, dotenv) is only imported at checkout,
+# so importing this module stays cheap for the GUI login screen and headless use.
+_ENV_LOADED = False
 
 # --- Global In-Memory Session Data ---
 # These variables track the current session and cart status.
@@ -20,10 +20,22 @@ CART = {} # {product_id (int): quantity (int)}
 # UTILITIES
 # =================================================================
 
+def load_environment():
+    """Loads the .env file once, on first use."""
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _ENV_LOADED = True
+
 def square_api_integration(total_amount, nonce="cnon:card-nonce-ok"):
     """
     Square API Integration with proper handling of DECLINED payments.
     """
+    import socket
+    import requests
+    load_environment()
+
     SQUARE_API_URL = "https://connect.squareupsandbox.com/v2/payments"
     SQUARE_ACCESS_TOKEN = "EAAAl3PMyhTGg7_s8mFSUWHEdam4bND16lE8aYfMnvtKJy97j4DJhwiXvJvnqYgk" #os.getenv("SQUARE_ACCESS_TOKEN")
 
@@ -143,12 +155,13 @@ def api_login_user(email, password):
     role = user['role']
     
     if role == 'seller':
-        status_row = get_seller_status(user_id)
-        if status_row and status_row['status'] == 'approved':
+        # Seller status comes joined in from the login query, no second lookup
+        seller_status = user['seller_status']
+        if seller_status == 'approved':
             CURRENT_USER["id"] = user_id
             CURRENT_USER["role"] = role
             return {"status": "success", "role": "seller", "message": f"Welcome back, approved seller: {user_id}"}
-        elif status_row and status_row['status'] == 'pending':
+        elif seller_status == 'pending':
             return {"status": "error", "message": "Seller account is registered but still **pending admin approval**."}
         else:
             return {"status": "error", "message": "Seller account is invalid or unapproved."}
@@ -171,15 +184,17 @@ def api_logout_user():
 # SELLER FUNCTIONS (UC-01: Add Product)
 # =================================================================
 
-def api_add_product(name, description, price, stock, image_format, image_size_mb):
+def api_add_product(name, description, price, stock, image_format, image_size_mb, image_path=None):
     """
     Simulates FR-S2 and UC-01. Inserts a product after validation.
+    The image (if given) is copied into the image store only once validation has passed.
     """
     seller_id = CURRENT_USER.get("id")
     if not seller_id or CURRENT_USER.get("role") != 'seller':
         return {"status": "error", "message": "Precondition failed: Not logged in as a seller."}
 
     # Precondition Check (UC-01) - Checked during login, but good to double-check
+    # (served from the short-TTL seller status cache during bulk entry)
     status_row = get_seller_status(seller_id)
     if not status_row or status_row['status'] != 'approved':
         return {"status": "error", "message": "Precondition failed: Seller is not approved."}
@@ -204,10 +219,21 @@ def api_add_product(name, description, price, stock, image_format, image_size_mb
         return {"status": "error", "message": "Validation failed: Image size must be under 5MB."}
 
     # --- Main Flow ---
+    image_hash = None
+    stored_new_image = False
     try:
-        product_id = insert_product(seller_id, name, description, price, stock, image_format)
-        return {"status": "success", "message": f"Product '{name}' added successfully with ID {product_id}."}
+        if image_path:
+            image_hash, stored_new_image = store_image(image_path)
+    except OSError as e:
+        return {"status": "error", "message": f"Could not store the product image: {e}"}
+
+    try:
+        product_id = insert_product(seller_id, name, description, price, stock, image_format, image_hash)
+        return {"status": "success", "message": f"Product '{name}' added successfully with ID {product_id}.",
+                "image_hash": image_hash}
     except Exception as e:
+        if stored_new_image:
+            discard_image(image_hash) # Don't leave an image no product points at
         return {"status": "fatal_error", "message": f"Database error during insert: {e}"}
 
 # =================================================================
@@ -279,13 +305,11 @@ def api_checkout(card_number, cvc):
 
     # 3. Fulfillment (Postcondition: Stock update)
     
-    # Store order here (Simulation: Order is stored, status 'Pending')
+    # Store order (status 'Pending') and Update Stock (FR-S3) in one transaction
     order_id = payment_result['id']
+    order_items = [{"product_id": p_id, "quantity": data["qty"]} for p_id, data in items_to_process.items()]
+    finalize_order(CURRENT_USER['id'], total_amount, order_id, order_items)
     print(f"ORDER SUCCESS: Order {order_id} placed for user {CURRENT_USER['id']}")
-
-    # Update Stock (FR-S3)
-    for p_id, data in items_to_process.items():
-        update_product_stock(p_id, -data["qty"])
         
     # Clear cart
     CART = {}
@@ -0,0 +1,112 @@
+"""
+Startup budget check for the GUI entry point.
+
+1. Runs `python -X importtime -c "import main"` and fails if the cumulative
+   import time of main exceeds the budget, or if a deferred dependency
+   (requests, dotenv, PIL, concurrent.futures) is imported at startup.
+2. Runs main.start_app() (everything main() does before mainloop) and times
+   import up to the login frame's first <Map>/<Expose>, so the DB rebuild
+   moving back in front of the login screen is caught. Skipped when no
+   display is available.
+
+Budgets are in milliseconds and can be overridden with STARTUP_IMPORT_BUDGET_MS
+and STARTUP_LOGIN_BUDGET_MS.
+
+Run from the project root:  python tests/startup_budget.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "150"))
+LOGIN_BUDGET_MS = float(os.getenv("STARTUP_LOGIN_BUDGET_MS", "500"))
+
+# Loaded on demand (checkout, image upload, thumbnails, report export), never at startup
+DEFERRED_MODULES = ["requests", "dotenv", "PIL", "concurrent.futures"]
+
+# Exit code used by the login probe when Tk cannot open a display
+NO_DISPLAY = 3
+
+# Runs main.start_app() (what main() does before mainloop) and reports the time
+# to the login frame's first <Map>/<Expose>, and to the end of start_app().
+LOGIN_PROBE = f"""
+import sys, time
+sys.path.insert(0, {PROJECT_ROOT!r})
+import tkinter as tk
+try:
+    tk.Tk().destroy()
+except tk.TclError:
+    sys.exit({NO_DISPLAY})
+started = time.perf_counter()
+import main
+painted = []
+def on_paint(event):
+    widget = str(event.widget)
+    if not painted and (widget == str(main.login_frame) or widget.startswith(str(main.login_frame) + ".")):
+        painted.append(time.perf_counter())
+build_gui = main.build_gui
+def build_gui_with_probe():
+    build_gui()
+    main.ROOT.bind_all("<Map>", on_paint, add="+")
+    main.ROOT.bind_all("<Expose>", on_paint, add="+")
+main.build_gui = build_gui_with_probe
+main.start_app()
+ready = time.perf_counter()
+if not painted:
+    sys.exit("login frame was never mapped by start_app()")
+print((painted[0] - started) * 1000, (ready - started) * 1000)
+main.ROOT.destroy()
+"""
+
+def run_python(*args, cwd=PROJECT_ROOT):
+    return subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True)
+
+def parse_importtime(stderr):
+    """Returns {module: cumulative microseconds} from -X importtime output."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            imports[name.strip()] = int(cumulative)
+        except ValueError:
+            continue # Header line
+    return imports
+
+def check_imports():
+    result = run_python("-X", "importtime", "-c", "import main")
+    assert result.returncode == 0, f"import main failed:\n{result.stderr}"
+    imports = parse_importtime(result.stderr)
+
+    eager = [name for name in DEFERRED_MODULES if name in imports]
+    assert not eager, f"Deferred modules imported at startup: {', '.join(eager)}"
+
+    elapsed_ms = imports["main"] / 1000
+    print(f"import main: {elapsed_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    assert elapsed_ms <= IMPORT_BUDGET_MS, f"import main took {elapsed_ms:.1f} ms, over budget"
+
+def check_login_screen():
+    # start_app() rebuilds the database in the cwd; keep the project database untouched
+    with tempfile.TemporaryDirectory() as workdir:
+        result = run_python("-c", LOGIN_PROBE, cwd=workdir)
+    if result.returncode == NO_DISPLAY:
+        print("login screen: SKIPPED (no display)")
+        return
+    assert result.returncode == 0, f"login screen probe failed:\n{result.stderr}"
+
+    painted_ms, ready_ms = (float(value) for value in result.stdout.strip().splitlines()[-1].split())
+    print(f"login screen: first paint {painted_ms:.1f} ms (budget {LOGIN_BUDGET_MS:.0f} ms), "
+          f"ready incl. DB rebuild {ready_ms:.1f} ms")
+    assert painted_ms <= LOGIN_BUDGET_MS, f"login screen took {painted_ms:.1f} ms to paint, over budget"
+
+def main():
+    check_imports()
+    check_login_screen()
+    print("OK: startup within budget")
+
+if __name__ == "__main__":
+    main()
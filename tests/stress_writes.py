@@ -0,0 +1,97 @@
+"""
+Multi-process write stress test for db_operations.run_write_transaction().
+
+N processes run a mix of insert_product, update_product_stock and finalize_order
+against one database, then the final counts are checked exactly (zero lost writes).
+It runs twice: with the default busy timeout, and with a 1ms busy timeout that
+makes SQLite report busy so the jittered retry path is exercised.
+
+Run from the project root:  python tests/stress_writes.py [processes] [iterations]
+"""
+import os
+import sys
+import tempfile
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_operations
+
+RESTOCK = 1_000_000 # Keeps the ordered product far from the zero clamp
+
+def configure(busy_timeout, retry_attempts):
+    """Pool initializer: applies the contention settings in every worker."""
+    db_operations.BUSY_TIMEOUT_SECONDS = busy_timeout
+    db_operations.WRITE_RETRY_ATTEMPTS = retry_attempts
+
+def writer(args):
+    """One worker: a fixed mix of writes. Returns its contention metrics."""
+    worker_id, iterations = args
+    db_operations.reset_db_metrics()
+    for i in range(iterations):
+        db_operations.update_product_stock(2, 1)
+        if i % 3 == 0:
+            db_operations.insert_product("S999", f"stress-{worker_id}-{i}", "", 1.0, 1, "png")
+        if i % 5 == 0:
+            db_operations.finalize_order("B007", 1.0, f"stress-{worker_id}-{i}", [{"product_id": 1, "quantity": 1}])
+    return db_operations.get_db_metrics()
+
+def run_scenario(label, processes, iterations, busy_timeout, retry_attempts):
+    """Runs the workers against a fresh database and asserts the exact final state."""
+    db_operations.initialize_db()
+    db_operations.update_product_stock(1, RESTOCK)
+
+    conn = db_operations.get_db_connection()
+    stock_1, stock_2 = (conn.execute("SELECT stock FROM products WHERE id = ?", (p,)).fetchone()[0] for p in (1, 2))
+    products_before = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    conn.close()
+
+    with mp.Pool(processes, initializer=configure, initargs=(busy_timeout, retry_attempts)) as pool:
+        metrics = pool.map(writer, [(w, iterations) for w in range(processes)])
+
+    inserts = processes * len(range(0, iterations, 3))
+    orders = processes * len(range(0, iterations, 5))
+    expected = {
+        "stock of product 1": stock_1 - orders,
+        "stock of product 2": stock_2 + processes * iterations,
+        "products": products_before + inserts,
+        "orders": orders,
+        "order items": orders,
+    }
+
+    conn = db_operations.get_db_connection()
+    actual = {
+        "stock of product 1": conn.execute("SELECT stock FROM products WHERE id = 1").fetchone()[0],
+        "stock of product 2": conn.execute("SELECT stock FROM products WHERE id = 2").fetchone()[0],
+        "products": conn.execute("SELECT COUNT(*) FROM products").fetchone()[0],
+        "orders": conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0],
+        "order items": conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0],
+    }
+    conn.close()
+
+    totals = {name: sum(m[name] for m in metrics) for name in metrics[0]}
+    print(f"{label}: transactions={totals['transactions']} retries={totals['retries']} "
+          f"failures={totals['failures']} lock_wait={totals['lock_wait_seconds']:.2f}s "
+          f"retry_wait={totals['retry_wait_seconds']:.2f}s")
+
+    assert actual == expected, f"{label}: lost writes, expected {expected}, got {actual}"
+    assert totals["failures"] == 0, f"{label}: {totals['failures']} transactions failed"
+    return totals
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir) # DB_NAME is relative; keep the project database untouched
+        run_scenario("default busy timeout", processes, iterations,
+                     db_operations.BUSY_TIMEOUT_SECONDS, db_operations.WRITE_RETRY_ATTEMPTS)
+        forced = run_scenario("1ms busy timeout", processes, iterations, 0.001, 50)
+        db_operations.close_db_connections()
+        os.chdir(os.path.dirname(workdir))
+
+    assert forced["retries"] > 0, "1ms busy timeout did not trigger any retries"
+    print("OK: zero lost writes")
+
+if __name__ == "__main__":
+    main()